@@ -0,0 +1,439 @@
+"""Offline bulk token counting over JSONL, CSV or Parquet files.
+
+Usage:
+
+    python -m app.bulk corpus.jsonl counts.jsonl --model gpt-4o --workers 8
+
+Records are streamed from the input, sharded across a process pool in
+batches (each worker loads its own TokenizerRegistry), and written to the
+output as JSONL in input order. Records that can't be parsed, fail to
+tokenize, or whose model fails to load are written with an "error" field
+instead of a count. A checkpoint next to the output records how far the run
+got, so re-running the same command resumes where it stopped.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import mmap
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+
+from app.services.logger import logger
+from app.services.tokenizer_registry import TokenizerRegistry
+
+FORMATS = ("jsonl", "csv", "parquet")
+
+_registry = None
+_init_error = None
+_tokenizers = {}
+
+
+# ── Readers ─────────────────────────────────────────────────────────────────
+#
+# Each reader yields (position, record) where position is where reading must
+# restart to continue after that record: a byte offset for plain files, a row
+# index for Parquet. A record that can't be parsed is yielded as a ValueError
+# so the run can write an error row for it and move on.
+
+
+def detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext in ("jsonl", "ndjson"):
+        return "jsonl"
+    if ext in ("csv", "parquet"):
+        return ext
+    raise ValueError(f"Cannot detect input format of {path}, pass --format")
+
+
+def _mmap_lines(path: str, start: int):
+    """Yield (end_offset, line) for each line of path from byte offset start."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            mm.seek(start)
+            while True:
+                line = mm.readline()
+                if not line:
+                    return
+                yield mm.tell(), line
+
+
+def read_jsonl(path: str, start: int = 0):
+    for position, line in _mmap_lines(path, start):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            record = ValueError(f"Invalid JSON: {str(e)}")
+        yield position, record
+
+
+def read_csv(path: str, start: int = 0):
+    position = 0
+
+    def lines(offset):
+        nonlocal position
+        for position, line in _mmap_lines(path, offset):
+            yield line.decode("utf-8")
+
+    header_lines = lines(0)
+    header = next(csv.reader(header_lines), None)
+    header_lines.close()
+    if header is None:
+        return
+
+    # csv.reader pulls exactly the lines of one record (quoted fields may span
+    # several), so position is the end of the record it just returned
+    for row in csv.reader(lines(max(start, position))):
+        yield position, dict(zip(header, row))
+
+
+def read_parquet(path: str, start: int = 0, columns=None):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Reading Parquet requires pyarrow (pip install pyarrow)")
+
+    row = 0
+    for batch in pq.ParquetFile(path).iter_batches(columns=columns):
+        if row + batch.num_rows <= start:
+            row += batch.num_rows
+            continue
+        skip = max(0, start - row)
+        row += skip
+        for record in batch.to_pylist()[skip:]:
+            row += 1
+            yield row, record
+
+
+# ── Workers ─────────────────────────────────────────────────────────────────
+
+
+def _init_worker(models, log_level=logging.WARNING):
+    global _registry, _init_error
+    logger.setLevel(log_level)
+    _init_error = None
+    try:
+        _registry = TokenizerRegistry(preload_tokenizers=models)
+    except Exception as e:
+        # An initializer that raises makes Pool respawn workers forever and
+        # the run hang; report the failure through the first task instead
+        _init_error = RuntimeError(f"Failed to initialize tokenizers: {str(e)}")
+
+
+def _get_tokenizer(model_name: str):
+    # Load synchronously and never fall back: the registry would otherwise
+    # answer with the default tokenizer while a model loads or after it fails,
+    # which would write wrong counts into a backfill
+    if model_name not in _tokenizers:
+        if model_name not in _registry.tokenizers:
+            _registry.register_tokenizer(model_name)
+        _tokenizers[model_name] = _registry.tokenizers.get(model_name)
+    tokenizer = _tokenizers[model_name]
+    if tokenizer is None:
+        raise ValueError(f"Failed to load tokenizer: {model_name}")
+    return tokenizer
+
+
+def count_batch(items):
+    """Count tokens for a list of (model, text) pairs in a worker.
+
+    Records that fail are returned as {"error": ...} so one bad record does
+    not stop the run.
+    """
+    if _init_error is not None:
+        raise _init_error
+
+    results = []
+    for model_name, text in items:
+        try:
+            tokenizer = _get_tokenizer(model_name)
+            token_count = tokenizer.count_tokens(text)["token_count"] if text else 0
+        except Exception as e:
+            results.append({"error": str(e), "model": model_name})
+            continue
+        results.append(
+            {
+                "token_count": token_count,
+                "model": tokenizer.model_name,
+                "tokenizer": tokenizer.tokenizer_type,
+            }
+        )
+    return results
+
+
+class _InlinePool:
+    """Stand-in for Pool when running with a single worker in-process."""
+
+    class _Result:
+        def __init__(self, value):
+            self._value = value
+
+        def get(self):
+            return self._value
+
+    def apply_async(self, fn, args):
+        return self._Result(fn(*args))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+# ── Checkpoints ─────────────────────────────────────────────────────────────
+
+
+def load_checkpoint(path: str):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, checkpoint: dict) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+# ── Driver ──────────────────────────────────────────────────────────────────
+
+
+def _batches(records, args):
+    batch = []
+    for position, record in records:
+        batch.append((position, record))
+        if len(batch) >= args.batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _record_error(record):
+    if isinstance(record, Exception):
+        return str(record)
+    if not isinstance(record, dict):
+        return f"Record is not an object: {json.dumps(record)[:100]}"
+    return None
+
+
+def _items(batch, args):
+    items = []
+    for _, record in batch:
+        if _record_error(record) is not None:
+            continue
+        model_name = record.get(args.model_field) if args.model_field else None
+        text = record.get(args.text_field)
+        items.append((model_name or args.model, "" if text is None else str(text)))
+    return items
+
+
+def run(args) -> dict:
+    input_format = args.format or detect_format(args.input)
+    checkpoint_path = args.checkpoint or args.output + ".checkpoint"
+
+    # Output written under other settings can't be continued with these
+    settings = {
+        "format": input_format,
+        "model": args.model,
+        "model_field": args.model_field,
+        "text_field": args.text_field,
+        "id_field": args.id_field,
+    }
+
+    checkpoint = load_checkpoint(checkpoint_path) if args.resume else None
+    if checkpoint and checkpoint.get("input") != os.path.abspath(args.input):
+        raise ValueError(f"Checkpoint {checkpoint_path} belongs to another input")
+    if checkpoint and checkpoint.get("settings") != settings:
+        changed = sorted(
+            name
+            for name, value in settings.items()
+            if checkpoint.get("settings", {}).get(name) != value
+        )
+        raise ValueError(
+            f"Checkpoint {checkpoint_path} was written with a different "
+            f"{', '.join(changed)}; rerun with --no-resume to start over"
+        )
+    if checkpoint is None:
+        checkpoint = {
+            "input": os.path.abspath(args.input),
+            "settings": settings,
+            "position": 0,
+            "records": 0,
+            "tokens": 0,
+            "output_bytes": 0,
+        }
+    else:
+        logger.warning(
+            f"[BulkTokenize] Resuming after {checkpoint['records']} records from {checkpoint_path}"
+        )
+
+    if input_format == "jsonl":
+        records = read_jsonl(args.input, checkpoint["position"])
+    elif input_format == "csv":
+        records = read_csv(args.input, checkpoint["position"])
+    elif input_format == "parquet":
+        columns = [c for c in (args.text_field, args.id_field, args.model_field) if c]
+        records = read_parquet(args.input, checkpoint["position"], columns)
+    else:
+        raise ValueError(f"Unsupported format: {input_format}")
+
+    # Drop anything written after the last checkpoint so resumed output has
+    # no duplicates
+    output_size = os.path.getsize(args.output) if os.path.exists(args.output) else 0
+    if output_size < checkpoint["output_bytes"]:
+        raise ValueError(
+            f"Output {args.output} is missing or shorter than checkpoint "
+            f"{checkpoint_path} records; rerun with --no-resume to start over"
+        )
+    mode = "r+b" if os.path.exists(args.output) else "wb"
+    out = open(args.output, mode)
+    out.truncate(checkpoint["output_bytes"])
+    out.seek(checkpoint["output_bytes"])
+
+    workers = args.workers or os.cpu_count() or 1
+    initargs = ([args.model], args.log_level)
+    if workers == 1:
+        _init_worker(*initargs)
+        pool = _InlinePool()
+    else:
+        pool = Pool(workers, initializer=_init_worker, initargs=initargs)
+
+    start_time = time.time()
+    last_report = start_time
+    records_done = tokens_done = errors = 0
+
+    def write(batch, results):
+        nonlocal records_done, tokens_done, errors
+        results = iter(results)
+        for position, record in batch:
+            output = {"index": checkpoint["records"]}
+            error = _record_error(record)
+            if error is not None:
+                # Not counted by the workers, see _items
+                result = {"error": error}
+            else:
+                if args.id_field:
+                    output["id"] = record.get(args.id_field)
+                result = next(results)
+            output.update(result)
+            out.write((json.dumps(output, ensure_ascii=False) + "\n").encode("utf-8"))
+            token_count = result.get("token_count", 0)
+            checkpoint["records"] += 1
+            checkpoint["tokens"] += token_count
+            records_done += 1
+            tokens_done += token_count
+            errors += "error" in result
+        out.flush()
+        checkpoint["position"] = batch[-1][0]
+        checkpoint["output_bytes"] = out.tell()
+        save_checkpoint(checkpoint_path, checkpoint)
+
+    try:
+        with pool:
+            # Bound the number of batches in flight; Pool.imap would read the
+            # whole input into its task queue up front
+            pending = deque()
+            for batch in _batches(records, args):
+                pending.append(
+                    (batch, pool.apply_async(count_batch, (_items(batch, args),)))
+                )
+                if len(pending) >= workers * 2:
+                    done_batch, result = pending.popleft()
+                    write(done_batch, result.get())
+
+                now = time.time()
+                if now - last_report >= args.report_every:
+                    _report(records_done, tokens_done, errors, now - start_time)
+                    last_report = now
+
+            while pending:
+                done_batch, result = pending.popleft()
+                write(done_batch, result.get())
+    finally:
+        out.close()
+
+    elapsed = time.time() - start_time
+    _report(records_done, tokens_done, errors, elapsed, final=True)
+    return {
+        "records": records_done,
+        "tokens": tokens_done,
+        "errors": errors,
+        "seconds": elapsed,
+        "records_per_second": records_done / elapsed if elapsed else 0.0,
+        "tokens_per_second": tokens_done / elapsed if elapsed else 0.0,
+    }
+
+
+def _report(records, tokens, errors, elapsed, final=False):
+    elapsed = elapsed or 1e-9
+    prefix = "Done" if final else "Progress"
+    print(
+        f"[BulkTokenize] {prefix}: {records} records ({errors} errors), "
+        f"{tokens} tokens in {elapsed:.1f}s "
+        f"({records / elapsed:.1f} records/s, {tokens / elapsed:.1f} tokens/s)",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.bulk",
+        description="Count tokens for every record of a JSONL, CSV or Parquet file.",
+    )
+    parser.add_argument("input", help="Input file")
+    parser.add_argument("output", help="Output JSONL file")
+    parser.add_argument("--model", required=True, help="Model or tokenizer name")
+    parser.add_argument("--format", choices=FORMATS, help="Defaults to extension")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--id-field", help="Field copied to the output as 'id'")
+    parser.add_argument("--model-field", help="Per-record model, overrides --model")
+    parser.add_argument(
+        "--workers", type=int, default=0, help="Processes (default: CPU count)"
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--checkpoint", help="Checkpoint path (default: OUTPUT.checkpoint)"
+    )
+    parser.add_argument(
+        "--no-resume",
+        dest="resume",
+        action="store_false",
+        help="Ignore an existing checkpoint and start over",
+    )
+    parser.add_argument(
+        "--report-every", type=float, default=5.0, help="Progress interval (s)"
+    )
+    parser.add_argument(
+        "--log-level",
+        type=lambda level: getattr(logging, level.upper()),
+        default=logging.WARNING,
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logger.setLevel(args.log_level)
+    try:
+        run(args)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
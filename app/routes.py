@@ -9,6 +9,8 @@ preload_tokenizers = [
     t.strip() for t in os.getenv("PRELOAD_TOKENIZERS", "").split(",") if t.strip()
 ]
 
+max_batch_size = int(os.getenv("MAX_BATCH_SIZE", "256"))
+
 main = Blueprint("main", __name__)
 registry = TokenizerRegistry(preload_tokenizers=preload_tokenizers)
 
@@ -28,43 +30,62 @@ def health():
 # Metrics endpoint is automatically added by prometheus-flask-exporter
 
 
-@main.route("/tokenizers/count", methods=["POST"])
-def count_tokens():
-    try:
-        data = request.json
-        text = data.get("text", "")
-        model_name = data.get("model", "")
+def _run(model_name, operation, action="Token count"):
+    """Run operation(tokenizer) for model_name and record metrics."""
+    if not model_name:
+        raise ValueError("Field 'model' is required")
+
+    # Measure tokenization time
+    start_time = time.time()
+    tokenizer = registry.get_tokenizer(model_name)
+    result = operation(tokenizer)
+
+    # Calculate duration
+    duration = time.time() - start_time
+
+    # Record all metrics with one call
+    track_tokens(
+        tokenizer_model=tokenizer.model_name,
+        input_model=model_name,
+        token_count=result.get("token_count", 0),
+        duration=duration,
+    )
 
-        if not model_name:
-            raise ValueError("Field 'model' is required")
+    logger.info(
+        f"{action} request for {model_name} with {result.get('token_count', 0)} tokens completed in {duration:.2f}s"
+    )
 
-        # Measure tokenization time
-        start_time = time.time()
-        tokenizer = registry.get_tokenizer(model_name)
+    return result
+
+
+def _count(text, model_name):
+    """Count tokens for one text and record metrics; returns the result dict."""
+
+    def operation(tokenizer):
         if not text:
-            result = {
+            return {
                 "token_count": 0,
                 "model": tokenizer.model_name,
                 "tokenizer": "openai",
             }
-        else:
-            result = tokenizer.count_tokens(text)
-
-        # Calculate duration
-        duration = time.time() - start_time
-
-        # Record all metrics with one call
-        track_tokens(
-            tokenizer_model=tokenizer.model_name,
-            input_model=model_name,
-            token_count=result.get("token_count", 0),
-            duration=duration,
-        )
+        return tokenizer.count_tokens(text)
+
+    return _run(model_name, operation)
+
+
+def _max_tokens(data):
+    max_tokens = data.get("max_tokens")
+    if isinstance(max_tokens, bool) or not isinstance(max_tokens, int):
+        raise ValueError("Field 'max_tokens' must be a non-negative integer")
+    return max_tokens
 
-        logger.info(
-            f"Token count request for {model_name} with {result.get('token_count', 0)} tokens completed in {duration:.2f}s"
-        )
 
+@main.route("/tokenizers/count", methods=["POST"])
+def count_tokens():
+    data = None
+    try:
+        data = request.json
+        result = _count(data.get("text", ""), data.get("model", ""))
         return jsonify(result)
 
     except ValueError as e:
@@ -77,9 +98,99 @@ def count_tokens():
         return jsonify({"error": "Internal server error: " + str(e)}), 500
 
 
+def _count_batch_item(item):
+    """Count one batch item, reporting failures in place of the result.
+
+    Batches coalesce unrelated callers, so one bad item must not fail the rest.
+    """
+    try:
+        if not isinstance(item, dict):
+            raise ValueError("Each request must be an object")
+        return _count(item.get("text", ""), item.get("model", ""))
+    except ValueError as e:
+        logger.warning(f"Validation error in batch item: {str(e)} - Item: {item}")
+        return {"error": str(e)}
+    except Exception as e:
+        logger.exception(f"Error processing batch item: Item: {item}")
+        return {"error": "Internal server error: " + str(e)}
+
+
+@main.route("/tokenizers/count/batch", methods=["POST"])
+def count_tokens_batch():
+    data = None
+    try:
+        data = request.json
+        items = data.get("requests")
+        if not isinstance(items, list):
+            raise ValueError("Field 'requests' must be a list")
+        if len(items) > max_batch_size:
+            raise ValueError(f"Field 'requests' is limited to {max_batch_size} items")
+
+        return jsonify({"results": [_count_batch_item(item) for item in items]})
+
+    except ValueError as e:
+        logger.warning(
+            f"Validation error in count_tokens_batch: {str(e)} - Request data: {data}"
+        )
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception(
+            f"Error processing count_tokens_batch request: Request data: {data}"
+        )
+        return jsonify({"error": "Internal server error: " + str(e)}), 500
+
+
+@main.route("/tokenizers/fits", methods=["POST"])
+def fits_within():
+    data = None
+    try:
+        data = request.json
+        text = data.get("text", "")
+        max_tokens = _max_tokens(data)
+        result = _run(
+            data.get("model", ""),
+            lambda tokenizer: tokenizer.fits_within(text, max_tokens),
+            action="Fits",
+        )
+        return jsonify(result)
+
+    except ValueError as e:
+        logger.warning(
+            f"Validation error in fits_within: {str(e)} - Request data: {data}"
+        )
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception(f"Error processing fits_within request: Request data: {data}")
+        return jsonify({"error": "Internal server error: " + str(e)}), 500
+
+
+@main.route("/tokenizers/truncate", methods=["POST"])
+def truncate():
+    data = None
+    try:
+        data = request.json
+        text = data.get("text", "")
+        max_tokens = _max_tokens(data)
+        result = _run(
+            data.get("model", ""),
+            lambda tokenizer: tokenizer.truncate(text, max_tokens),
+            action="Truncate",
+        )
+        return jsonify(result)
+
+    except ValueError as e:
+        logger.warning(f"Validation error in truncate: {str(e)} - Request data: {data}")
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception(f"Error processing truncate request: Request data: {data}")
+        return jsonify({"error": "Internal server error: " + str(e)}), 500
+
+
 @main.route("/tokenizers/list", methods=["GET"])
 def list_active_tokenizers():
     active_models = registry.list_active_tokenizers()
     # Update active tokenizers gauge
     ACTIVE_TOKENIZERS.set(len(active_models))
-    return jsonify({"active_tokenizers": active_models})
+    return jsonify(
+        {"active_tokenizers": active_models, **registry.describe_tokenizers()}
+    )
@@ -1,7 +1,104 @@
+import copy
 from abc import ABC, abstractmethod
 
 
 class BaseTokenizer(ABC):
+    tokenizer_type = None
+    # Whether the library already keeps one copy of each loaded vocab, so
+    # aliases wouldn't have duplicated it even without sharing an instance
+    caches_vocab = False
+
+    # Size of the first chunk, in characters per allowed token. Chunks double
+    # until the limit is exceeded, so oversized inputs cost O(max_tokens).
+    CHARS_PER_TOKEN = 4
+    MIN_CHUNK_CHARS = 256
+    # Trailing tokens of a prefix that may still merge with the text after the
+    # cut; a prefix only proves the limit is exceeded past this margin.
+    BOUNDARY_TOKENS = 16
+
     @abstractmethod
     def count_tokens(self, model_name: str, text: str) -> dict:
         pass
+
+    @classmethod
+    def fingerprint(cls, model_name: str) -> str:
+        """Identify the underlying tokenizer without loading it.
+
+        Model names with the same fingerprint share one loaded instance.
+        """
+        return f"{cls.tokenizer_type}:{model_name}"
+
+    def alias(self, model_name: str):
+        """Return a copy reporting model_name that shares this vocab."""
+        tokenizer = copy.copy(self)
+        tokenizer.model_name = model_name
+        return tokenizer
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the loaded vocab, for reporting."""
+        return 0
+
+    @abstractmethod
+    def _encode(self, text: str) -> list:
+        """Tokenize text the same way count_tokens does."""
+        pass
+
+    @abstractmethod
+    def _offset_after(self, text: str, tokens: list, n: int) -> int:
+        """Character offset in text to cut at so that it encodes to at most
+        n tokens, special tokens included."""
+        pass
+
+    def _encode_prefix(self, text: str, max_tokens: int):
+        """Encode growing prefixes of text until max_tokens is clearly exceeded.
+
+        Returns (prefix, tokens, complete) where complete means the whole text
+        was tokenized.
+        """
+        if max_tokens < 0:
+            raise ValueError("Field 'max_tokens' must be a non-negative integer")
+
+        size = max(max_tokens * self.CHARS_PER_TOKEN, self.MIN_CHUNK_CHARS)
+        while True:
+            prefix = text[:size]
+            tokens = self._encode(prefix) if prefix else []
+            if len(prefix) == len(text):
+                return prefix, tokens, True
+            if len(tokens) > max_tokens + self.BOUNDARY_TOKENS:
+                return prefix, tokens, False
+            size *= 2
+
+    def fits_within(self, text: str, max_tokens: int) -> dict:
+        _, tokens, complete = self._encode_prefix(text, max_tokens)
+        return {
+            "fits": complete and len(tokens) <= max_tokens,
+            "token_count": len(tokens),
+            "max_tokens": max_tokens,
+            "model": self.model_name,
+            "tokenizer": self.tokenizer_type,
+        }
+
+    def truncate(self, text: str, max_tokens: int) -> dict:
+        prefix, tokens, complete = self._encode_prefix(text, max_tokens)
+        fits = complete and len(tokens) <= max_tokens
+        if fits:
+            offset, token_count = len(text), len(tokens)
+        else:
+            # Re-encoding the cut text can merge differently at the boundary
+            # than the prefix did; step back until the result fits the limit
+            keep = max_tokens
+            while True:
+                offset = self._offset_after(prefix, tokens, keep)
+                token_count = len(self._encode(text[:offset])) if offset else 0
+                if token_count <= max_tokens or keep == 0:
+                    break
+                keep = max(0, keep - (token_count - max_tokens))
+        return {
+            "fits": fits,
+            "text": text[:offset],
+            "offset": offset,
+            "token_count": token_count,
+            "max_tokens": max_tokens,
+            "model": self.model_name,
+            "tokenizer": self.tokenizer_type,
+        }
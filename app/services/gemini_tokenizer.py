@@ -1,5 +1,6 @@
 import warnings
 
+from google.genai import _local_tokenizer_loader as loader
 from google.genai._common import ExperimentalWarning
 from google.genai.local_tokenizer import LocalTokenizer
 from app.services.base_tokenizer import BaseTokenizer
@@ -7,11 +8,25 @@ from app.services.logger import logger
 
 
 class GeminiTokenizer(BaseTokenizer):
+    tokenizer_type = "gemini"
+    caches_vocab = True  # the loader lru_caches protos per tokenizer name
+
     def __init__(self, model_name: str):
         self.model_name = model_name
         self.tokenizer = LocalTokenizer(model_name=model_name)
         logger.info(f"[GeminiTokenizer] Loaded LocalTokenizer for: {model_name}")
 
+    @classmethod
+    def fingerprint(cls, model_name: str) -> str:
+        try:
+            return f"gemini:{loader.get_tokenizer_name(model_name)}"
+        except ValueError:
+            return super().fingerprint(model_name)
+
+    def memory_bytes(self) -> int:
+        model_proto = getattr(self.tokenizer, "_model_proto", None)
+        return model_proto.ByteSize() if model_proto is not None else 0
+
     def count_tokens(self, text: str) -> dict:
         with warnings.catch_warnings():
             warnings.filterwarnings("ignore", category=ExperimentalWarning)
@@ -21,3 +36,26 @@ class GeminiTokenizer(BaseTokenizer):
             "model": self.model_name,
             "tokenizer": "gemini",
         }
+
+    def _encode(self, text: str) -> list:
+        # Same call count_tokens makes, without the Content conversion
+        return self.tokenizer._tokenizer.encode(text)
+
+    def _offset_after(self, text: str, tokens: list, n: int) -> int:
+        # Newer Gemini models use a Gemma HF tokenizer whose pieces (byte
+        # fallback and special tokens) don't map back onto the input
+        if getattr(self.tokenizer, "_model_proto", None) is None:
+            raise ValueError(f"Truncation is not supported for {self.model_name}")
+        if n <= 0:
+            return 0
+
+        sentencepiece = self.tokenizer._tokenizer
+        try:
+            proto = sentencepiece.encode(text, return_type="proto")
+        except TypeError:  # sentencepiece < 0.2.1
+            proto = sentencepiece.encode(text, out_type="immutable_proto")
+        # Pieces carry byte spans into the original input; byte-fallback
+        # pieces inside a character end where it starts, so partial
+        # characters are never kept
+        end = max((piece.end for piece in proto.pieces[:n]), default=0)
+        return len(text.encode("utf-8")[:end].decode("utf-8", errors="ignore"))
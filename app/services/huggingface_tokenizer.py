@@ -1,12 +1,153 @@
+import hashlib
+import json
+import os
+
 from transformers import AutoTokenizer
+from transformers.models.auto.tokenization_auto import tokenizer_class_from_name
+from transformers.tokenization_utils_base import get_fast_tokenizer_file
+from transformers.utils import CHAT_TEMPLATE_DIR, CHAT_TEMPLATE_FILE, cached_file
+from transformers.utils.hub import list_repo_templates
 from app.services.base_tokenizer import BaseTokenizer
 
+# Files that together define a tokenizer; fine-tunes usually ship them as-is
+TOKENIZER_FILES = (
+    "tokenizer.json",
+    "tokenizer_config.json",
+    "special_tokens_map.json",
+    "added_tokens.json",
+    "tokenizer.model",
+    "vocab.json",
+    "merges.txt",
+    "vocab.txt",
+)
+
+# Files from_pretrained loads for every tokenizer class besides its vocab
+CONFIG_FILES = (
+    "tokenizer_config.json",
+    "special_tokens_map.json",
+    "added_tokens.json",
+    CHAT_TEMPLATE_FILE,
+)
+
+# Rough per-token cost for slow tokenizers, which can't be serialized
+_ENTRY_OVERHEAD_BYTES = 100
+
+
+def _resolve(model_name: str, filename: str):
+    return cached_file(
+        model_name,
+        filename,
+        _raise_exceptions_for_missing_entries=False,
+        _raise_exceptions_for_connection_errors=False,
+    )
+
+
+def tokenizer_files(model_name: str) -> dict:
+    """Resolve the tokenizer files of a model (downloading them if needed)."""
+    files = {}
+    for filename in TOKENIZER_FILES:
+        path = _resolve(model_name, filename)
+        if path:
+            files[filename] = path
+    return files
+
+
+def _chat_templates(model_name: str) -> list:
+    """Extra chat templates from_pretrained picks up, as repo paths."""
+    if os.path.isdir(model_name):
+        template_dir = os.path.join(model_name, CHAT_TEMPLATE_DIR)
+        names = os.listdir(template_dir) if os.path.isdir(template_dir) else []
+        names = [name for name in names if name.endswith(".jinja")]
+    else:
+        names = list_repo_templates(model_name, local_files_only=False)
+    # The hub lists file names, the local cache lists template names
+    return sorted(
+        f"{CHAT_TEMPLATE_DIR}/{name.removesuffix('.jinja')}.jinja" for name in names
+    )
+
+
+def pretrained_files(model_name: str) -> dict:
+    """Resolve the files from_pretrained loads for the model's tokenizer.
+
+    That is the tokenizer class's vocab files, tokenizer.json (or the
+    versioned file named by fast_tokenizer_files) and the config and chat
+    template files. Empty when tokenizer_config.json names no known
+    tokenizer class or none of its vocab files exist.
+    """
+    config_path = _resolve(model_name, "tokenizer_config.json")
+    if not config_path:
+        return {}
+    with open(config_path, encoding="utf-8") as f:
+        config = json.load(f)
+    class_name = config.get("tokenizer_class")
+    if not class_name:
+        return {}
+    tokenizer_class = tokenizer_class_from_name(class_name)
+    if tokenizer_class is None and class_name.endswith("Fast"):
+        tokenizer_class = tokenizer_class_from_name(class_name[: -len("Fast")])
+    if tokenizer_class is None:
+        return {}
+    filenames = set(getattr(tokenizer_class, "vocab_files_names", {}).values())
+    # Loaded whatever the class is, even when it doesn't list it itself
+    if "fast_tokenizer_files" in config:
+        filenames.add(get_fast_tokenizer_file(config["fast_tokenizer_files"]))
+    else:
+        filenames.add("tokenizer.json")
+
+    files = {}
+    for filename in filenames:
+        path = _resolve(model_name, filename)
+        if path:
+            files[filename] = path
+    if not files:
+        return {}
+
+    for filename in (*CONFIG_FILES, *_chat_templates(model_name)):
+        path = _resolve(model_name, filename)
+        if path:
+            files[filename] = path
+    return files
+
 
 class HuggingFaceTokenizer(BaseTokenizer):
+    tokenizer_type = "huggingface"
+
     def __init__(self, model_name: str):
         self.model_name = model_name
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
 
+    @classmethod
+    def fingerprint(cls, model_name: str) -> str:
+        # Hash what from_pretrained actually reads, so repos that differ
+        # only in e.g. spiece.model or tokenizer.json don't collide; without
+        # a recognized vocab there's nothing safe to compare, so keep the
+        # model to itself
+        try:
+            files = pretrained_files(model_name)
+        except Exception:
+            files = {}
+        if not files:
+            return super().fingerprint(model_name)
+
+        digest = hashlib.sha256()
+        for filename, path in sorted(files.items()):
+            with open(path, "rb") as f:
+                content = f.read()
+            if filename == "tokenizer_config.json":
+                # The repo name is recorded here and differs between fine-tunes
+                config = json.loads(content)
+                config.pop("name_or_path", None)
+                config.pop("_name_or_path", None)
+                content = json.dumps(config, sort_keys=True).encode("utf-8")
+            digest.update(filename.encode("utf-8"))
+            digest.update(hashlib.sha256(content).digest())
+        return f"huggingface:{digest.hexdigest()[:16]}"
+
+    def memory_bytes(self) -> int:
+        if self.tokenizer.is_fast:
+            return len(self.tokenizer.backend_tokenizer.to_str())
+        return len(self.tokenizer) * _ENTRY_OVERHEAD_BYTES
+
     def count_tokens(self, text: str) -> dict:
         input_ids = self.tokenizer.encode(text, add_special_tokens=True)
         return {
@@ -14,3 +155,21 @@ class HuggingFaceTokenizer(BaseTokenizer):
             "model": self.model_name,
             "tokenizer": "huggingface",
         }
+
+    def _encode(self, text: str) -> list:
+        return self.tokenizer.encode(text, add_special_tokens=True)
+
+    def _offset_after(self, text: str, tokens: list, n: int) -> int:
+        if not self.tokenizer.is_fast:
+            raise ValueError(f"Truncation is not supported for {self.model_name}")
+        # Leave room for the special tokens the post-processor adds back
+        # ([CLS]/[SEP], BOS/EOS) when the cut text is encoded again
+        content_tokens = n - self.tokenizer.num_special_tokens_to_add()
+        if content_tokens <= 0:
+            return 0
+        encoding = self.tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True
+        )
+        return max(
+            (end for _, end in encoding["offset_mapping"][:content_tokens]), default=0
+        )
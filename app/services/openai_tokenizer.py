@@ -2,7 +2,14 @@ import tiktoken
 from app.services.base_tokenizer import BaseTokenizer
 
 
+# Rough per-token cost of the encoder and decoder maps on top of token bytes
+_ENTRY_OVERHEAD_BYTES = 100
+
+
 class OpenAITokenizer(BaseTokenizer):
+    tokenizer_type = "openai"
+    caches_vocab = True  # tiktoken.registry.ENCODINGS
+
     def __init__(self, model_name: str):
         self.model_name = model_name
         try:
@@ -13,6 +20,22 @@ class OpenAITokenizer(BaseTokenizer):
             except (KeyError, ValueError):
                 raise ValueError(f"Invalid model or tokenizer name: {model_name}")
 
+    @classmethod
+    def fingerprint(cls, model_name: str) -> str:
+        try:
+            return f"openai:{tiktoken.encoding_name_for_model(model_name)}"
+        except KeyError:
+            pass
+        if model_name in tiktoken.list_encoding_names():
+            return f"openai:{model_name}"
+        return super().fingerprint(model_name)
+
+    def memory_bytes(self) -> int:
+        token_bytes = self.encoder.token_byte_values()
+        return (
+            sum(len(b) for b in token_bytes) + len(token_bytes) * _ENTRY_OVERHEAD_BYTES
+        )
+
     def count_tokens(self, text: str) -> dict:
         tokens = self.encoder.encode(text)
         return {
@@ -20,3 +43,11 @@ class OpenAITokenizer(BaseTokenizer):
             "model": self.model_name,
             "tokenizer": "openai",
         }
+
+    def _encode(self, text: str) -> list:
+        return self.encoder.encode(text)
+
+    def _offset_after(self, text: str, tokens: list, n: int) -> int:
+        # Tokens may split a multi-byte character; only count whole characters
+        n_bytes = sum(len(b) for b in self.encoder.decode_tokens_bytes(tokens[:n]))
+        return len(text.encode("utf-8")[:n_bytes].decode("utf-8", errors="ignore"))
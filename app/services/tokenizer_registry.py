@@ -1,4 +1,4 @@
-from app.services.huggingface_tokenizer import HuggingFaceTokenizer
+from app.services.huggingface_tokenizer import HuggingFaceTokenizer, tokenizer_files
 from app.services.openai_tokenizer import OpenAITokenizer
 from app.services.gemini_tokenizer import GeminiTokenizer
 import tiktoken
@@ -8,6 +8,12 @@ import threading
 
 DEFAULT_TOKENIZER = "o200k_base"
 
+TOKENIZER_CLASSES = {
+    "gemini": GeminiTokenizer,
+    "huggingface": HuggingFaceTokenizer,
+    "openai": OpenAITokenizer,
+}
+
 
 class TokenizerRegistry:
     def __init__(self, preload_tokenizers=None):
@@ -18,6 +24,12 @@ class TokenizerRegistry:
         self._loading_tokenizers = {}  # Track tokenizers being loaded
         self._executor = ThreadPoolExecutor(max_workers=3)  # Background thread pool
         self._lock = threading.Lock()
+        # Model names that resolve to the same tokenizer share one instance
+        self._fingerprints = {}  # model name -> fingerprint
+        self._instances = {}  # fingerprint -> loaded tokenizer
+        self._instance_memory = {}  # fingerprint -> approximate bytes
+        self._load_locks = {}  # fingerprint -> lock held while loading
+        self._instances_lock = threading.Lock()
 
         # Ensure default tokenizer is loaded first
         logger.info(
@@ -69,10 +81,8 @@ class TokenizerRegistry:
             pass
 
         try:
-            from transformers import AutoTokenizer
-
-            AutoTokenizer.from_pretrained(model_name)
-            return "huggingface"
+            if tokenizer_files(model_name):
+                return "huggingface"
         except Exception:
             pass
 
@@ -90,12 +100,9 @@ class TokenizerRegistry:
             logger.debug(
                 f"[TokenizerRegistry] Creating {tokenizer_type} tokenizer for {model_name}"
             )
-            if tokenizer_type == "gemini":
-                tokenizer = GeminiTokenizer(model_name)
-            elif tokenizer_type == "huggingface":
-                tokenizer = HuggingFaceTokenizer(model_name)
-            else:
-                tokenizer = OpenAITokenizer(model_name)
+            tokenizer = self._create_tokenizer(
+                model_name, TOKENIZER_CLASSES.get(tokenizer_type, OpenAITokenizer)
+            )
 
             with self._lock:
                 logger.debug(
@@ -117,6 +124,32 @@ class TokenizerRegistry:
                 f"[TokenizerRegistry] Failed to load tokenizer {model_name}: {str(e)}"
             )
 
+    def _create_tokenizer(self, model_name: str, tokenizer_class):
+        """Create a tokenizer, sharing the instance of any alias already loaded.
+
+        Only self._instances_lock and the per-fingerprint load lock are taken
+        here, since register_tokenizer may run while self._lock is held.
+        """
+        fingerprint = tokenizer_class.fingerprint(model_name)
+        with self._instances_lock:
+            load_lock = self._load_locks.setdefault(fingerprint, threading.Lock())
+
+        with load_lock:
+            instance = self._instances.get(fingerprint)
+            if instance is None:
+                instance = tokenizer_class(model_name)
+                self._instance_memory[fingerprint] = instance.memory_bytes()
+                self._instances[fingerprint] = instance
+            else:
+                logger.info(
+                    f"[TokenizerRegistry] {model_name} shares tokenizer {fingerprint} with {instance.model_name}"
+                )
+
+        self._fingerprints[model_name] = fingerprint
+        if instance.model_name == model_name:
+            return instance
+        return instance.alias(model_name)
+
     def register_tokenizer(self, model_name: str):
         logger.info(
             f"[TokenizerRegistry] Attempting to register tokenizer: {model_name}"
@@ -132,17 +165,18 @@ class TokenizerRegistry:
             f"[TokenizerRegistry] Creating {tokenizer_type} tokenizer for {model_name}"
         )
         try:
-            if tokenizer_type == "gemini":
-                self.tokenizers[model_name] = GeminiTokenizer(model_name)
-            elif tokenizer_type == "huggingface":
-                self.tokenizers[model_name] = HuggingFaceTokenizer(model_name)
-            elif tokenizer_type == "openai":
-                self.tokenizers[model_name] = OpenAITokenizer(model_name)
+            if tokenizer_type in TOKENIZER_CLASSES:
+                self.tokenizers[model_name] = self._create_tokenizer(
+                    model_name, TOKENIZER_CLASSES[tokenizer_type]
+                )
             else:
                 logger.warning(
                     f"[TokenizerRegistry] Unknown tokenizer type {tokenizer_type}, using default tokenizer"
                 )
-                self.tokenizers[model_name] = OpenAITokenizer(DEFAULT_TOKENIZER)
+                self.tokenizers[model_name] = self._create_tokenizer(
+                    DEFAULT_TOKENIZER, OpenAITokenizer
+                )
+                self._fingerprints[model_name] = self._fingerprints[DEFAULT_TOKENIZER]
             logger.info(f"[TokenizerRegistry] Tokenizer registered: {model_name}")
         except Exception as e:
             logger.error(
@@ -222,3 +256,31 @@ class TokenizerRegistry:
     def list_active_tokenizers(self):
         active_tokenizers = list(self.tokenizers.keys())
         return active_tokenizers
+
+    def describe_tokenizers(self):
+        """Report which model names share an instance and the memory saved."""
+        aliases = {
+            model_name: self._fingerprints.get(model_name)
+            for model_name in self.list_active_tokenizers()
+        }
+        instances = {}
+        for model_name, fingerprint in aliases.items():
+            instances.setdefault(
+                fingerprint,
+                {
+                    "models": [],
+                    "memory_bytes": self._instance_memory.get(fingerprint, 0),
+                },
+            )["models"].append(model_name)
+
+        # Only count aliases that would otherwise have loaded their own copy
+        memory_saved = sum(
+            instance["memory_bytes"] * (len(instance["models"]) - 1)
+            for fingerprint, instance in instances.items()
+            if not getattr(self._instances.get(fingerprint), "caches_vocab", False)
+        )
+        return {
+            "aliases": aliases,
+            "instances": instances,
+            "memory_saved_bytes": memory_saved,
+        }
@@ -0,0 +1,91 @@
+"""Compare the naive per-call HTTP wrapper with TokenizerClient.
+
+Run against a live server, e.g.:
+
+    python tests/loadtest/client_benchmark.py --host http://localhost:8080
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from tokenizer_client import TokenizerClient  # noqa: E402
+
+TEXT = "OpenAIs large language models process text using tokens, which are common sequences of characters found in a set of text. "
+
+
+def naive_count(host, text, model):
+    # What every team hand-rolls: no session, no keep-alive, no batching
+    response = httpx.post(
+        f"{host}/tokenizers/count", json={"text": text, "model": model}
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def run(name, fn, texts, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(fn, texts))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {len(texts) / elapsed:>10.1f} calls/s  ({elapsed:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="http://localhost:8080")
+    parser.add_argument("--model", default="LGAI-EXAONE/EXAONE-3.5-32B-Instruct")
+    parser.add_argument("--local-model", default="gpt-4o")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=32)
+    args = parser.parse_args()
+
+    # Unique texts so the client's LRU doesn't short-circuit the comparison
+    texts = [f"{i} {TEXT}" for i in range(args.calls)]
+
+    run(
+        "naive (per-call)",
+        lambda t: naive_count(args.host, t, args.model),
+        texts,
+        args.threads,
+    )
+
+    with TokenizerClient(args.host, batch_window=None, local=False) as client:
+        run(
+            "pooled",
+            lambda t: client.count_tokens(t, args.model),
+            texts,
+            args.threads,
+        )
+
+    with TokenizerClient(args.host, local=False) as client:
+        run(
+            "pooled + batched",
+            lambda t: client.count_tokens(t, args.model),
+            texts,
+            args.threads,
+        )
+        run(
+            "pooled + batched (cached)",
+            lambda t: client.count_tokens(t, args.model),
+            texts,
+            args.threads,
+        )
+
+    with TokenizerClient(args.host) as client:
+        run(
+            f"local ({args.local_model})",
+            lambda t: client.count_tokens(t, args.local_model),
+            texts,
+            args.threads,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import csv
+import json
+
+import pytest
+
+from app import bulk
+
+
+def _write_jsonl(path, n):
+    with open(path, "w") as f:
+        for i in range(n):
+            f.write(json.dumps({"id": i, "text": "Hello world " * (i % 5)}) + "\n")
+
+
+# ── Readers ─────────────────────────────────────────────────────────────────
+
+
+def test_read_jsonl_resumes_from_position(tmp_path):
+    path = tmp_path / "in.jsonl"
+    _write_jsonl(path, 10)
+
+    records = list(bulk.read_jsonl(str(path)))
+    assert [r["id"] for _, r in records] == list(range(10))
+
+    position = records[3][0]
+    resumed = list(bulk.read_jsonl(str(path), position))
+    assert [r["id"] for _, r in resumed] == list(range(4, 10))
+
+
+def test_read_csv_multiline_fields(tmp_path):
+    path = tmp_path / "in.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "text"])
+        writer.writerow(["0", "first\nsecond line"])
+        writer.writerow(["1", "plain"])
+
+    records = list(bulk.read_csv(str(path)))
+    assert [r for _, r in records] == [
+        {"id": "0", "text": "first\nsecond line"},
+        {"id": "1", "text": "plain"},
+    ]
+
+    resumed = list(bulk.read_csv(str(path), records[0][0]))
+    assert [r["id"] for _, r in resumed] == ["1"]
+
+
+def test_resume_refuses_missing_output(tmp_path):
+    path = tmp_path / "in.jsonl"
+    output = tmp_path / "out.jsonl"
+    _write_jsonl(path, 3)
+    bulk.save_checkpoint(
+        str(output) + ".checkpoint",
+        {
+            "input": str(path),
+            "settings": {
+                "format": "jsonl",
+                "model": "o200k_base",
+                "model_field": None,
+                "text_field": "text",
+                "id_field": None,
+            },
+            "position": 10,
+            "records": 1,
+            "tokens": 0,
+            "output_bytes": 50,
+        },
+    )
+
+    args = bulk.parse_args([str(path), str(output), "--model", "o200k_base"])
+    with pytest.raises(ValueError, match="missing or shorter"):
+        bulk.run(args)
+    assert not output.exists()
+
+
+def test_resume_refuses_changed_settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk, "TokenizerRegistry", lambda **_: _StubRegistry())
+    monkeypatch.setattr(bulk, "_tokenizers", {})
+    path = tmp_path / "in.jsonl"
+    output = tmp_path / "out.jsonl"
+    _write_jsonl(path, 3)
+    argv = [str(path), str(output), "--workers", "1"]
+
+    assert bulk.run(bulk.parse_args(argv + ["--model", "stub"]))["records"] == 3
+    with pytest.raises(ValueError, match="different model"):
+        bulk.run(bulk.parse_args(argv + ["--model", "other"]))
+    with pytest.raises(ValueError, match="different text_field"):
+        bulk.run(bulk.parse_args(argv + ["--model", "stub", "--text-field", "t"]))
+    assert len(output.read_text().splitlines()) == 3
+
+    # Starting over is still allowed
+    argv += ["--model", "other", "--no-resume"]
+    assert bulk.run(bulk.parse_args(argv))["records"] == 3
+
+
+class _StubTokenizer:
+    model_name = "stub"
+    tokenizer_type = "stub"
+
+    def count_tokens(self, text):
+        if "<|endoftext|>" in text:
+            raise ValueError("Disallowed special token")
+        return {"token_count": len(text.split())}
+
+
+class _StubRegistry:
+    def __init__(self):
+        self.tokenizers = {"stub": _StubTokenizer()}
+
+    def register_tokenizer(self, model_name):
+        pass
+
+
+def test_count_batch_reports_errors_per_record(monkeypatch):
+    monkeypatch.setattr(bulk, "_registry", _StubRegistry())
+    monkeypatch.setattr(bulk, "_tokenizers", {})
+
+    results = bulk.count_batch(
+        [
+            ("stub", "Hello world"),
+            ("stub", "<|endoftext|>"),
+            ("missing/model", "Hello world"),
+            ("stub", ""),
+        ]
+    )
+
+    assert results[0]["token_count"] == 2
+    assert "error" in results[1]
+    assert results[2] == {
+        "error": "Failed to load tokenizer: missing/model",
+        "model": "missing/model",
+    }
+    assert results[3]["token_count"] == 0
+
+
+def test_read_parquet_resumes_from_row(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    path = tmp_path / "in.parquet"
+    table = pa.table({"id": list(range(10)), "text": [f"row {i}" for i in range(10)]})
+    pq.write_table(table, str(path), row_group_size=3)
+
+    records = list(bulk.read_parquet(str(path), columns=["id", "text"]))
+    assert [r["id"] for _, r in records] == list(range(10))
+
+    resumed = list(bulk.read_parquet(str(path), records[4][0], ["id", "text"]))
+    assert [r["id"] for _, r in resumed] == list(range(5, 10))
+
+
+def test_detect_format():
+    assert bulk.detect_format("corpus.jsonl") == "jsonl"
+    assert bulk.detect_format("corpus.CSV") == "csv"
+    assert bulk.detect_format("corpus.parquet") == "parquet"
+
+
+# ── End to end ──────────────────────────────────────────────────────────────
+
+
+def test_bulk_run_and_resume(tmp_path):
+    path = tmp_path / "in.jsonl"
+    output = tmp_path / "out.jsonl"
+    _write_jsonl(path, 25)
+    argv = [
+        str(path),
+        str(output),
+        "--model",
+        "o200k_base",
+        "--workers",
+        "1",
+        "--batch-size",
+        "10",
+        "--id-field",
+        "id",
+    ]
+
+    stats = bulk.run(bulk.parse_args(argv))
+    assert stats["records"] == 25
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [row["id"] for row in rows] == list(range(25))
+    assert rows[0]["token_count"] == 0
+    assert rows[1]["token_count"] > 0
+    assert all(row["model"] == "o200k_base" for row in rows)
+
+    # A completed run leaves nothing to do on resume
+    assert bulk.run(bulk.parse_args(argv))["records"] == 0
+    assert len(output.read_text().splitlines()) == 25
+
+
+def test_bulk_run_writes_errors_for_malformed_records(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk, "TokenizerRegistry", lambda **_: _StubRegistry())
+    monkeypatch.setattr(bulk, "_tokenizers", {})
+    path = tmp_path / "in.jsonl"
+    output = tmp_path / "out.jsonl"
+    path.write_text(
+        '{"id": 0, "text": "Hello world"}\n'
+        '{"id": 1, "text": \n'
+        '["list"]\n'
+        '{"id": 3, "text": "Hello"}\n'
+    )
+    argv = [str(path), str(output), "--model", "stub", "--workers", "1"]
+    argv += ["--batch-size", "2", "--id-field", "id"]
+
+    stats = bulk.run(bulk.parse_args(argv))
+    assert stats["records"] == 4
+    assert stats["errors"] == 2
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert rows[0]["id"] == 0 and rows[0]["token_count"] == 2
+    assert rows[1]["index"] == 1 and rows[1]["error"].startswith("Invalid JSON")
+    assert rows[2]["index"] == 2 and "not an object" in rows[2]["error"]
+    assert rows[3]["id"] == 3 and rows[3]["token_count"] == 1
+
+    # The bad lines are behind the checkpoint, so resuming has nothing to do
+    assert bulk.run(bulk.parse_args(argv))["records"] == 0
+
+
+def test_bulk_run_multiprocess(tmp_path):
+    path = tmp_path / "in.jsonl"
+    output = tmp_path / "out.jsonl"
+    _write_jsonl(path, 50)
+    argv = [
+        str(path),
+        str(output),
+        "--model",
+        "o200k_base",
+        "--workers",
+        "2",
+        "--batch-size",
+        "7",
+        "--id-field",
+        "id",
+    ]
+
+    stats = bulk.run(bulk.parse_args(argv))
+    assert stats["records"] == 50
+    assert stats["errors"] == 0
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [row["id"] for row in rows] == list(range(50))
+    assert all(row["model"] == "o200k_base" for row in rows)
+
+
+def test_bulk_run_parquet(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    path = tmp_path / "in.parquet"
+    output = tmp_path / "out.jsonl"
+    texts = ["Hello world " * (i % 5) for i in range(20)]
+    pq.write_table(pa.table({"id": list(range(20)), "text": texts}), str(path))
+    argv = [str(path), str(output), "--model", "o200k_base", "--workers", "2"]
+    argv += ["--id-field", "id"]
+
+    stats = bulk.run(bulk.parse_args(argv))
+    assert stats["records"] == 20
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [row["id"] for row in rows] == list(range(20))
+    assert rows[0]["token_count"] == 0
+    assert rows[1]["token_count"] > 0
@@ -0,0 +1,298 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import httpx
+import pytest
+
+from tokenizer_client import AsyncTokenizerClient, TokenizerClient
+from tokenizer_client.cache import LRUCache
+
+
+def _fake_server():
+    """MockTransport that counts whitespace-separated words and records calls."""
+    calls = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        calls.append((request.url.path, body))
+        if request.url.path == "/tokenizers/count/batch":
+            results = [
+                {"error": "bad input"}
+                if r["text"] == "bad"
+                else {"token_count": len(r["text"].split()), "model": r["model"]}
+                for r in body["requests"]
+            ]
+            return httpx.Response(200, json={"results": results})
+        return httpx.Response(
+            200,
+            json={"token_count": len(body["text"].split()), "model": body["model"]},
+        )
+
+    return handler, calls
+
+
+# ── Cache ───────────────────────────────────────────────────────────────────
+
+
+def test_lru_cache_evicts_least_recent():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+# ── Sync client ─────────────────────────────────────────────────────────────
+
+
+def test_client_coalesces_concurrent_calls():
+    handler, calls = _fake_server()
+    client = TokenizerClient(
+        transport=httpx.MockTransport(handler), local=False, batch_window=0.05
+    )
+    barrier = threading.Barrier(8)
+    results = {}
+
+    def worker(i):
+        barrier.wait()
+        results[i] = client.count_tokens("word " * (i + 1), "some/model")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    client.close()
+
+    assert [results[i]["token_count"] for i in range(8)] == list(range(1, 9))
+    assert all(path == "/tokenizers/count/batch" for path, _ in calls)
+    assert len(calls) < 8
+
+
+def test_client_sends_batches_concurrently():
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def handler(request):
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        threading.Event().wait(0.05)
+        with lock:
+            in_flight.pop()
+        body = json.loads(request.content)
+        return httpx.Response(
+            200,
+            json={
+                "results": [
+                    {"token_count": 1, "model": r["model"]} for r in body["requests"]
+                ]
+            },
+        )
+
+    client = TokenizerClient(
+        transport=httpx.MockTransport(handler),
+        local=False,
+        batch_window=0,
+        max_batch_size=1,
+        max_connections=4,
+    )
+    threads = [
+        threading.Thread(target=client.count_tokens, args=(str(i), "some/model"))
+        for i in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    client.close()
+
+    assert 1 < max(peak) <= 4
+
+
+def test_client_item_error_only_fails_its_caller():
+    handler, calls = _fake_server()
+    client = TokenizerClient(
+        transport=httpx.MockTransport(handler), local=False, batch_window=0.05
+    )
+    barrier = threading.Barrier(4)
+    results = {}
+
+    def worker(text):
+        barrier.wait()
+        try:
+            results[text] = client.count_tokens(text, "some/model")
+        except ValueError as e:
+            results[text] = e
+
+    threads = [
+        threading.Thread(target=worker, args=(text,))
+        for text in ("a", "a b", "bad", "a b c")
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    client.close()
+
+    assert isinstance(results["bad"], ValueError)
+    assert results["a"]["token_count"] == 1
+    assert results["a b c"]["token_count"] == 3
+
+
+def test_client_caches_results():
+    handler, calls = _fake_server()
+    with TokenizerClient(
+        transport=httpx.MockTransport(handler), local=False, batch_window=None
+    ) as client:
+        first = client.count_tokens("Hello world", "some/model")
+        second = client.count_tokens("Hello world", "some/model")
+    assert first == second
+    assert len(calls) == 1
+
+
+def test_client_does_not_cache_default_fallback():
+    def handler(request):
+        return httpx.Response(200, json={"token_count": 2, "model": "o200k_base"})
+
+    transport = httpx.MockTransport(handler)
+    with TokenizerClient(transport=transport, local=False, batch_window=None) as client:
+        client.count_tokens("Hello world", "some/model")
+        assert client._cache.get(("some/model", "Hello world")) is None
+
+
+def test_client_batch_preserves_order():
+    handler, calls = _fake_server()
+    with TokenizerClient(
+        transport=httpx.MockTransport(handler), local=False, max_batch_size=2
+    ) as client:
+        results = client.count_tokens_batch([("a", "m"), ("a b", "m"), ("a b c", "m")])
+    assert [r["token_count"] for r in results] == [1, 2, 3]
+    assert len(calls) == 2
+
+
+def _flaky(handler, failures):
+    """Wrap handler so the first requests fail with the given errors."""
+    failures = list(failures)
+
+    def flaky_handler(request):
+        if failures:
+            failure = failures.pop(0)
+            if isinstance(failure, Exception):
+                raise failure
+            return httpx.Response(failure, json={"error": "unavailable"})
+        return handler(request)
+
+    return flaky_handler
+
+
+def test_client_retries_server_errors():
+    handler, calls = _fake_server()
+    client = TokenizerClient(
+        transport=httpx.MockTransport(_flaky(handler, [503])),
+        local=False,
+        retry_backoff=0,
+    )
+    assert client.count_tokens("one two", "some/model")["token_count"] == 2
+    assert client.count_tokens_batch([("a b c", "some/model")])[0]["token_count"] == 3
+    client.close()
+    assert len(calls) == 2
+
+
+def test_client_retries_transport_errors_without_batching():
+    handler, calls = _fake_server()
+    transport = httpx.MockTransport(_flaky(handler, [httpx.ReadTimeout("timeout")]))
+    client = TokenizerClient(
+        transport=transport, local=False, batch_window=None, retry_backoff=0
+    )
+    assert client.count_tokens("one two", "some/model")["token_count"] == 2
+    client.close()
+    assert [path for path, _ in calls] == ["/tokenizers/count"]
+
+
+def test_client_does_not_retry_client_errors():
+    handler, calls = _fake_server()
+    client = TokenizerClient(
+        transport=httpx.MockTransport(_flaky(handler, [400])),
+        local=False,
+        batch_window=None,
+        retry_backoff=0,
+    )
+    with pytest.raises(ValueError):
+        client.count_tokens("one two", "some/model")
+    client.close()
+    assert calls == []
+
+
+def test_client_counts_tiktoken_models_locally():
+    from app.services.openai_tokenizer import OpenAITokenizer
+
+    handler, calls = _fake_server()
+    with TokenizerClient(transport=httpx.MockTransport(handler)) as client:
+        result = client.count_tokens("Hello world", "gpt-4o")
+    assert result == OpenAITokenizer("gpt-4o").count_tokens("Hello world")
+    assert calls == []
+
+
+def test_client_does_not_import_server():
+    # Counting locally must not pull in Flask/app.metrics, which would switch
+    # the caller's prometheus_client into multiprocess mode
+    script = (
+        "import os, sys\n"
+        "from tokenizer_client.local import count_local\n"
+        "count_local('some/model', 'Hello world')\n"
+        "assert 'app' not in sys.modules, 'app imported'\n"
+        "assert 'PROMETHEUS_MULTIPROC_DIR' not in os.environ\n"
+    )
+    env = {k: v for k, v in os.environ.items() if k != "PROMETHEUS_MULTIPROC_DIR"}
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=root, env=env, capture_output=True
+    )
+    assert result.returncode == 0, result.stderr.decode()
+
+
+# ── Async client ────────────────────────────────────────────────────────────
+
+
+def test_async_client_coalesces_concurrent_calls():
+    handler, calls = _fake_server()
+
+    async def main():
+        async with AsyncTokenizerClient(
+            transport=httpx.MockTransport(handler), local=False
+        ) as client:
+            return await asyncio.gather(
+                *(
+                    client.count_tokens("word " * (i + 1), "some/model")
+                    for i in range(8)
+                )
+            )
+
+    results = asyncio.run(main())
+    assert [r["token_count"] for r in results] == list(range(1, 9))
+    assert len(calls) == 1
+
+
+def test_async_client_retries_server_errors():
+    handler, calls = _fake_server()
+    failures = [502, httpx.ConnectError("refused")]
+
+    async def main():
+        async with AsyncTokenizerClient(
+            transport=httpx.MockTransport(_flaky(handler, failures)),
+            local=False,
+            retry_backoff=0,
+        ) as client:
+            return await client.count_tokens("one two", "some/model")
+
+    assert asyncio.run(main())["token_count"] == 2
+    assert len(calls) == 1
@@ -65,6 +65,155 @@ def test_count_tokens_huggingface(client):
     assert data["tokenizer"] in ("huggingface", "openai")
 
 
+def test_openai_tokenizer_fits_within_unit():
+    from app.services.openai_tokenizer import OpenAITokenizer
+
+    tokenizer = OpenAITokenizer("o200k_base")
+    text = "This is a test sentence. " * 10000
+    total = tokenizer.count_tokens(text)["token_count"]
+
+    assert tokenizer.fits_within(text, total)["fits"]
+    result = tokenizer.fits_within(text, 100)
+    assert not result["fits"]
+    assert result["token_count"] < total
+
+
+def test_openai_tokenizer_truncate_unit():
+    from app.services.openai_tokenizer import OpenAITokenizer
+
+    tokenizer = OpenAITokenizer("o200k_base")
+    text = "This is a test sentence. " * 10000
+    result = tokenizer.truncate(text, 100)
+
+    expected = tokenizer.encoder.decode(tokenizer.encoder.encode(text)[:100])
+    assert result["text"] == expected
+    assert result["offset"] == len(expected)
+    assert result["token_count"] == 100
+    assert not result["fits"]
+
+
+def test_registry_shares_tokenizer_across_aliases():
+    from app.services.tokenizer_registry import TokenizerRegistry
+
+    registry = TokenizerRegistry(preload_tokenizers=["gpt-4o", "gpt-4o-mini"])
+    default = registry.get_tokenizer("o200k_base")
+    gpt_4o = registry.get_tokenizer("gpt-4o")
+
+    assert gpt_4o.encoder is default.encoder
+    assert gpt_4o.model_name == "gpt-4o"
+
+    description = registry.describe_tokenizers()
+    assert description["aliases"]["gpt-4o-mini"] == "openai:o200k_base"
+    assert description["instances"]["openai:o200k_base"]["models"] == [
+        "o200k_base",
+        "gpt-4o",
+        "gpt-4o-mini",
+    ]
+    # tiktoken caches encodings itself, so sharing saves nothing here
+    assert description["memory_saved_bytes"] == 0
+
+
+def test_registry_reports_memory_saved_for_huggingface_aliases(tmp_path):
+    from app.services.tokenizer_registry import TokenizerRegistry
+
+    first = _bert_style_tokenizer(tmp_path / "first")
+    second = _bert_style_tokenizer(tmp_path / "second")
+    registry = TokenizerRegistry(preload_tokenizers=[first, second])
+
+    assert registry.tokenizers[first].tokenizer is registry.tokenizers[second].tokenizer
+    description = registry.describe_tokenizers()
+    instance = description["instances"][description["aliases"][first]]
+    assert instance["models"] == [first, second]
+    assert description["memory_saved_bytes"] == instance["memory_bytes"] > 0
+
+
+def _bert_style_tokenizer(path):
+    """Save a tiny fast tokenizer that wraps input in [CLS] ... [SEP]."""
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors
+    from transformers import PreTrainedTokenizerFast
+
+    words = ["hello", "world", "this", "is", "a", "test", "sentence", "."]
+    vocab = {"[PAD]": 0, "[UNK]": 1, "[CLS]": 2, "[SEP]": 3}
+    vocab.update({word: i + 4 for i, word in enumerate(words)})
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", 2), ("[SEP]", 3)]
+    )
+    PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        unk_token="[UNK]",
+        pad_token="[PAD]",
+        cls_token="[CLS]",
+        sep_token="[SEP]",
+    ).save_pretrained(str(path))
+    return str(path)
+
+
+def test_huggingface_tokenizer_truncate_counts_special_tokens(tmp_path):
+    from app.services.huggingface_tokenizer import HuggingFaceTokenizer
+
+    tokenizer = HuggingFaceTokenizer(_bert_style_tokenizer(tmp_path))
+    text = "hello world this is a test sentence . " * 200
+    result = tokenizer.truncate(text, 5)
+
+    # [CLS] hello world this [SEP]
+    assert result["text"] == "hello world this"
+    assert result["token_count"] == 5
+    assert tokenizer.count_tokens(result["text"])["token_count"] == 5
+    assert tokenizer.fits_within(result["text"], 5)["fits"]
+    assert not tokenizer.fits_within(text, 5)["fits"]
+
+
+def test_huggingface_fingerprint_hashes_class_vocab_files(tmp_path):
+    from app.services.huggingface_tokenizer import HuggingFaceTokenizer
+
+    def repo(name, files):
+        path = tmp_path / name
+        path.mkdir()
+        for filename, content in files.items():
+            (path / filename).write_bytes(content)
+        return str(path)
+
+    config = json.dumps({"tokenizer_class": "T5Tokenizer"}).encode()
+    first = repo("a", {"tokenizer_config.json": config, "spiece.model": b"one"})
+    second = repo("b", {"tokenizer_config.json": config, "spiece.model": b"two"})
+    copy = repo("c", {"tokenizer_config.json": config, "spiece.model": b"one"})
+
+    # Same config but a different SentencePiece vocab must not be shared
+    assert HuggingFaceTokenizer.fingerprint(first) != (
+        HuggingFaceTokenizer.fingerprint(second)
+    )
+    assert HuggingFaceTokenizer.fingerprint(first) == (
+        HuggingFaceTokenizer.fingerprint(copy)
+    )
+
+    # No vocab file the class recognizes: keep the model to itself
+    unknown = repo("d", {"tokenizer_config.json": config, "source.spm": b"one"})
+    assert HuggingFaceTokenizer.fingerprint(unknown) == f"huggingface:{unknown}"
+
+
+def test_huggingface_fingerprint_hashes_tokenizer_json(tmp_path):
+    from app.services.huggingface_tokenizer import HuggingFaceTokenizer
+
+    def repo(name, tokenizer_json):
+        path = tmp_path / name
+        path.mkdir()
+        config = {"tokenizer_class": "GPT2Tokenizer"}
+        (path / "tokenizer_config.json").write_text(json.dumps(config))
+        (path / "vocab.json").write_text(json.dumps({"a": 0, "b": 1}))
+        (path / "merges.txt").write_text("#version: 0.2\n")
+        (path / "tokenizer.json").write_text(json.dumps(tokenizer_json))
+        return str(path)
+
+    # GPT2Tokenizer doesn't list tokenizer.json, but from_pretrained loads it
+    plain = repo("plain", {"post_processor": None})
+    with_bos = repo("bos", {"post_processor": {"type": "TemplateProcessing"}})
+    assert HuggingFaceTokenizer.fingerprint(plain) != (
+        HuggingFaceTokenizer.fingerprint(with_bos)
+    )
+
+
 # ── Gemini ───────────────────────────────────────────────────────────────────
 
 
@@ -132,6 +281,22 @@ def test_gemini_tokenizer_long_text():
     assert result["tokenizer"] == "gemini"
 
 
+def test_gemini_tokenizer_truncate():
+    from app.services.gemini_tokenizer import GeminiTokenizer
+
+    tokenizer = GeminiTokenizer("gemini-2.0-flash")
+    text = "This is a test sentence. 你好世界 " * 1000
+    result = tokenizer.truncate(text, 50)
+
+    assert not result["fits"]
+    assert text.startswith(result["text"])
+    assert 0 < result["token_count"] <= 50
+    assert (
+        tokenizer.count_tokens(result["text"])["token_count"] == result["token_count"]
+    )
+    assert tokenizer.fits_within(result["text"], 50)["fits"]
+
+
 # ── Fallback & validation ───────────────────────────────────────────────────
 
 
@@ -157,9 +322,101 @@ def test_missing_fields(client):
     assert response.status_code == 400
 
 
+def test_count_tokens_batch(client):
+    response = client.post(
+        "/tokenizers/count/batch",
+        data=json.dumps(
+            {
+                "requests": [
+                    {"text": "Hello world", "model": "o200k_base"},
+                    {"text": "", "model": "o200k_base"},
+                ]
+            }
+        ),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert len(results) == 2
+    assert results[0]["token_count"] > 0
+    assert results[1]["token_count"] == 0
+
+
+def test_count_tokens_batch_item_errors(client):
+    response = client.post(
+        "/tokenizers/count/batch",
+        data=json.dumps(
+            {
+                "requests": [
+                    {"text": "Hello world"},
+                    "not an object",
+                    {"text": "<|endoftext|>", "model": "o200k_base"},
+                    {"text": "Hello world", "model": "o200k_base"},
+                ]
+            }
+        ),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert "error" in results[0]
+    assert "error" in results[1]
+    assert "error" in results[2]
+    assert results[3]["token_count"] > 0
+
+
+def test_count_tokens_batch_too_large(client):
+    response = client.post(
+        "/tokenizers/count/batch",
+        data=json.dumps({"requests": [{"text": "a", "model": "o200k_base"}] * 10000}),
+        content_type="application/json",
+    )
+    assert response.status_code == 400
+
+
+def test_fits_within(client):
+    response = client.post(
+        "/tokenizers/fits",
+        data=json.dumps(
+            {"text": "Hello world", "model": "o200k_base", "max_tokens": 10}
+        ),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["fits"] is True
+    assert data["token_count"] == 2
+
+
+def test_truncate(client):
+    response = client.post(
+        "/tokenizers/truncate",
+        data=json.dumps(
+            {"text": "Hello world " * 1000, "model": "o200k_base", "max_tokens": 5}
+        ),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["fits"] is False
+    assert data["token_count"] == 5
+    assert data["text"] == ("Hello world " * 1000)[: data["offset"]]
+
+
+def test_truncate_invalid_max_tokens(client):
+    response = client.post(
+        "/tokenizers/truncate",
+        data=json.dumps({"text": "Hello world", "model": "o200k_base"}),
+        content_type="application/json",
+    )
+    assert response.status_code == 400
+
+
 def test_list_active_tokenizers(client):
     response = client.get("/tokenizers/list")
     assert response.status_code == 200
     data = response.get_json()
     assert "active_tokenizers" in data
     assert "o200k_base" in data["active_tokenizers"]
+    assert data["aliases"]["o200k_base"] == "openai:o200k_base"
+    assert "memory_saved_bytes" in data
@@ -0,0 +1,3 @@
+from tokenizer_client.client import AsyncTokenizerClient, TokenizerClient
+
+__all__ = ["TokenizerClient", "AsyncTokenizerClient"]
@@ -0,0 +1,158 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class Batcher:
+    """Coalesces concurrent sync calls into batched requests.
+
+    Callers enqueue ``(model, text)`` pairs and block on a Future. A
+    background thread waits ``window`` seconds after the first pending item
+    so that concurrent callers can join, then hands up to ``max_batch_size``
+    items to a pool of ``max_in_flight`` sender threads. While every sender
+    is busy, new items accumulate and form the next batch.
+
+    ``send`` returns one result per item; an Exception in place of a result
+    is raised only to the caller that submitted that item.
+    """
+
+    def __init__(
+        self,
+        send,
+        window: float = 0.002,
+        max_batch_size: int = 64,
+        max_in_flight: int = 1,
+    ):
+        self._send = send
+        self._window = window
+        self._max_batch_size = max_batch_size
+        self._pending = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+
+    def submit(self, model_name: str, text: str) -> Future:
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Batcher is closed")
+            self._pending.append((model_name, text, future))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return future
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+
+            # Wait for a free sender before taking the batch, so items keep
+            # accumulating while every connection is busy
+            self._slots.acquire()
+            with self._cond:
+                full = len(self._pending) >= self._max_batch_size
+            if not full and self._window > 0:
+                time.sleep(self._window)
+
+            with self._cond:
+                batch = self._pending[: self._max_batch_size]
+                self._pending = self._pending[self._max_batch_size :]
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch):
+        try:
+            _dispatch(self._send, batch)
+        finally:
+            self._slots.release()
+
+
+def _dispatch(send, batch):
+    try:
+        results = send([(model_name, text) for model_name, text, _ in batch])
+    except Exception as e:
+        for _, _, future in batch:
+            future.set_exception(e)
+        return
+    for (_, _, future), result in zip(batch, results):
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+
+class AsyncBatcher:
+    """asyncio counterpart of Batcher; ``send`` is a coroutine function."""
+
+    def __init__(self, send, window: float = 0.002, max_batch_size: int = 64):
+        self._send = send
+        self._window = window
+        self._max_batch_size = max_batch_size
+        self._pending = []
+        self._flush_task = None
+        self._inflight = set()
+
+    async def submit(self, model_name: str, text: str) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((model_name, text, future))
+        if len(self._pending) >= self._max_batch_size:
+            self._start(self._take())
+        elif self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._flush_later())
+        return await future
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            await self._flush_task
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    def _take(self):
+        batch = self._pending[: self._max_batch_size]
+        self._pending = self._pending[self._max_batch_size :]
+        return batch
+
+    def _start(self, batch):
+        task = asyncio.ensure_future(self._dispatch(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _flush_later(self):
+        if self._window > 0:
+            await asyncio.sleep(self._window)
+        self._flush_task = None
+        while self._pending:
+            self._start(self._take())
+
+    async def _dispatch(self, batch):
+        try:
+            results = await self._send(
+                [(model_name, text) for model_name, text, _ in batch]
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,289 @@
+import asyncio
+import time
+
+import httpx
+
+from tokenizer_client.batching import AsyncBatcher, Batcher
+from tokenizer_client.cache import LRUCache
+from tokenizer_client.local import count_local
+
+DEFAULT_BASE_URL = "http://localhost:8080"
+COUNT_PATH = "/tokenizers/count"
+BATCH_PATH = "/tokenizers/count/batch"
+
+
+class _BaseClient:
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        timeout: float = 10.0,
+        max_connections: int = 20,
+        retries: int = 3,
+        retry_backoff: float = 0.1,
+        cache_size: int = 4096,
+        local: bool = True,
+        batch_window: float = 0.002,
+        max_batch_size: int = 64,
+    ):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self.max_connections = max_connections
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.local = local
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._cache = LRUCache(cache_size)
+
+    def _cached(self, model_name: str, text: str):
+        if not model_name:
+            raise ValueError("Field 'model' is required")
+        return self._cache.get((model_name, text))
+
+    def _count_local(self, model_name: str, text: str):
+        if not self.local:
+            return None
+        result = count_local(model_name, text)
+        if result is not None:
+            self._cache.put((model_name, text), result)
+        return result
+
+    def _count_cached_or_local(self, model_name: str, text: str):
+        """Return a result without touching the network, or None."""
+        result = self._cached(model_name, text)
+        if result is None:
+            result = self._count_local(model_name, text)
+        return result
+
+    def _remember(self, model_name: str, text: str, result: dict) -> dict:
+        # The server answers with the default tokenizer while the requested
+        # one is still loading; don't pin that fallback in the cache.
+        if result.get("model") == model_name:
+            self._cache.put((model_name, text), result)
+        return result
+
+    def _retry_delay(self, attempt: int, response=None):
+        """Seconds to wait before retrying, or None to give up.
+
+        Connection errors, timeouts, 429 and 5xx responses (e.g. while a
+        server worker restarts) are retried with exponential backoff.
+        """
+        if attempt >= self.retries:
+            return None
+        if response is not None and not (
+            response.status_code == 429 or response.status_code >= 500
+        ):
+            return None
+        return self.retry_backoff * 2**attempt
+
+    @staticmethod
+    def _payload(items):
+        return {"requests": [{"model": m, "text": t} for m, t in items]}
+
+    @staticmethod
+    def _item_errors(results):
+        """Turn per-item error entries into exceptions for the batcher."""
+        return [
+            ValueError(result["error"]) if "error" in result else result
+            for result in results
+        ]
+
+    @staticmethod
+    def _parse(response: httpx.Response):
+        if response.status_code == 400:
+            raise ValueError(response.json().get("error", response.text))
+        response.raise_for_status()
+        return response.json()
+
+
+class TokenizerClient(_BaseClient):
+    """Pooled, batching client for the Universal Tokenizer service.
+
+    Calls from concurrent threads are coalesced into ``/tokenizers/count/batch``
+    requests. Requests that fail with a connection error, timeout, 429 or 5xx
+    are retried up to ``retries`` times with exponential backoff starting at
+    ``retry_backoff`` seconds. Results are kept in a local LRU, and tiktoken
+    models are counted in-process without a network round trip when ``local``
+    is enabled.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, transport=None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self._http = httpx.Client(
+            base_url=base_url,
+            timeout=self.timeout,
+            transport=transport or httpx.HTTPTransport(limits=self.limits),
+        )
+        self._batcher = (
+            Batcher(
+                self._send_coalesced,
+                self.batch_window,
+                self.max_batch_size,
+                max_in_flight=self.max_connections,
+            )
+            if self.batch_window is not None
+            else None
+        )
+
+    def count_tokens(self, text: str, model: str) -> dict:
+        result = self._count_cached_or_local(model, text)
+        if result is not None:
+            return result
+
+        if self._batcher is not None:
+            result = self._batcher.submit(model, text).result()
+        else:
+            response = self._post(COUNT_PATH, {"text": text, "model": model})
+            result = self._parse(response)
+        return self._remember(model, text, result)
+
+    def count_tokens_batch(self, items) -> list:
+        """Count tokens for a list of ``(text, model)`` pairs in one request.
+
+        Items the server rejects come back as ``{"error": ...}`` in place.
+        """
+        results = [None] * len(items)
+        missing = []
+        for i, (text, model) in enumerate(items):
+            results[i] = self._count_cached_or_local(model, text)
+            if results[i] is None:
+                missing.append(i)
+
+        for start in range(0, len(missing), self.max_batch_size):
+            chunk = missing[start : start + self.max_batch_size]
+            fetched = self._send_batch([(items[i][1], items[i][0]) for i in chunk])
+            for i, result in zip(chunk, fetched):
+                text, model = items[i]
+                results[i] = self._remember(model, text, result)
+        return results
+
+    def _post(self, path: str, payload: dict) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                response = self._http.post(path, json=payload)
+            except httpx.TransportError:
+                delay = self._retry_delay(attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry_delay(attempt, response=response)
+                if delay is None:
+                    return response
+            time.sleep(delay)
+            attempt += 1
+
+    def _send_batch(self, items) -> list:
+        response = self._post(BATCH_PATH, self._payload(items))
+        return self._parse(response)["results"]
+
+    def _send_coalesced(self, items) -> list:
+        return self._item_errors(self._send_batch(items))
+
+    def close(self) -> None:
+        if self._batcher is not None:
+            self._batcher.close()
+        self._http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncTokenizerClient(_BaseClient):
+    """asyncio variant of TokenizerClient sharing the same cache and fallback."""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, transport=None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=self.timeout,
+            transport=transport or httpx.AsyncHTTPTransport(limits=self.limits),
+        )
+        self._batcher = (
+            AsyncBatcher(self._send_coalesced, self.batch_window, self.max_batch_size)
+            if self.batch_window is not None
+            else None
+        )
+
+    async def _count_cached_or_local_async(self, model_name: str, text: str):
+        result = self._cached(model_name, text)
+        if result is None and self.local:
+            # Loading an encoding may download it and encoding is CPU-bound;
+            # keep both off the event loop
+            result = await asyncio.to_thread(self._count_local, model_name, text)
+        return result
+
+    async def count_tokens(self, text: str, model: str) -> dict:
+        result = await self._count_cached_or_local_async(model, text)
+        if result is not None:
+            return result
+
+        if self._batcher is not None:
+            result = await self._batcher.submit(model, text)
+        else:
+            response = await self._post(COUNT_PATH, {"text": text, "model": model})
+            result = self._parse(response)
+        return self._remember(model, text, result)
+
+    async def count_tokens_batch(self, items) -> list:
+        """Count tokens for a list of ``(text, model)`` pairs in one request.
+
+        Items the server rejects come back as ``{"error": ...}`` in place.
+        """
+        results = [None] * len(items)
+        missing = []
+        for i, (text, model) in enumerate(items):
+            results[i] = await self._count_cached_or_local_async(model, text)
+            if results[i] is None:
+                missing.append(i)
+
+        for start in range(0, len(missing), self.max_batch_size):
+            chunk = missing[start : start + self.max_batch_size]
+            fetched = await self._send_batch(
+                [(items[i][1], items[i][0]) for i in chunk]
+            )
+            for i, result in zip(chunk, fetched):
+                text, model = items[i]
+                results[i] = self._remember(model, text, result)
+        return results
+
+    async def _post(self, path: str, payload: dict) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                response = await self._http.post(path, json=payload)
+            except httpx.TransportError:
+                delay = self._retry_delay(attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry_delay(attempt, response=response)
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _send_batch(self, items) -> list:
+        response = await self._post(BATCH_PATH, self._payload(items))
+        return self._parse(response)["results"]
+
+    async def _send_coalesced(self, items) -> list:
+        return self._item_errors(await self._send_batch(items))
+
+    async def close(self) -> None:
+        if self._batcher is not None:
+            await self._batcher.close()
+        await self._http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
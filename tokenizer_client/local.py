@@ -0,0 +1,59 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_local_encodings = {}
+_lock = threading.Lock()
+
+
+def _load_encoding(model_name: str):
+    """Resolve a tiktoken encoding with the same rules as the server's
+    OpenAITokenizer: model name first, then encoding name."""
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except (KeyError, ValueError):
+        try:
+            return tiktoken.get_encoding(model_name)
+        except (KeyError, ValueError):
+            return None
+
+
+def get_local_encoding(model_name: str):
+    """Return a tiktoken encoding for tiktoken models, else None.
+
+    Both hits and misses are memoized so non-tiktoken models (HuggingFace,
+    Gemini) only pay the lookup once before going straight to the server.
+    tiktoken is optional; without it every model goes to the server.
+    """
+    with _lock:
+        if model_name in _local_encodings:
+            return _local_encodings[model_name]
+
+    try:
+        encoding = _load_encoding(model_name)
+    except ImportError:
+        encoding = None
+    except Exception as e:
+        logger.warning(
+            f"[TokenizerClient] Local tokenizer unavailable for {model_name}: {str(e)}"
+        )
+        encoding = None
+
+    with _lock:
+        _local_encodings[model_name] = encoding
+    return encoding
+
+
+def count_local(model_name: str, text: str):
+    """Count tokens in-process, mirroring the server's response, or None."""
+    encoding = get_local_encoding(model_name)
+    if encoding is None:
+        return None
+    return {
+        "token_count": len(encoding.encode(text)) if text else 0,
+        "model": model_name,
+        "tokenizer": "openai",
+    }